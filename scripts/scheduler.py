@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+优先级 + 截止时间感知的请求调度器
+交互请求插队，后台请求在竞争时让出容量；
+剩余时间不足的请求不再发往上游，而是用过期缓存应答或直接放弃
+"""
+
+import heapq
+import itertools
+import math
+import threading
+import time
+from concurrent.futures import Future
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+
+class _Job:
+    __slots__ = ("query", "priority", "deadline", "kwargs", "future")
+
+    def __init__(self, query, priority, deadline, kwargs):
+        self.query = query
+        self.priority = priority
+        self.deadline = deadline
+        self.kwargs = kwargs
+        self.future = Future()
+
+
+class RequestScheduler:
+    """
+    多工作线程请求队列
+
+    search_fn(query, timeout=..., **kwargs) 需返回 search_twitter 风格的结果 dict，
+    timeout 为剩余时间（秒），无截止时间时为 None。
+    max_workers 个并发槽位中保留 reserved_interactive 个只给交互请求使用，
+    后台请求只能占用剩余容量。保留槽位即使空闲也不借给后台请求：
+    这样新到的交互请求无需等待正在执行的后台请求，代价是纯后台负载下吞吐少一个槽位，
+    确定不会有交互请求时（如批量模式）应设 reserved_interactive=0。
+
+    剩余时间低于 min_budget 的请求不占用槽位，任何空闲工作线程都会立即将其放弃。
+    过期缓存只保存在本进程内存中，只有嵌入长期运行的调用方时才可能命中；
+    CLI 每次运行都是新进程，放弃的请求基本只会得到错误结果。
+    """
+
+    def __init__(
+        self,
+        search_fn,
+        max_workers: int = 4,
+        reserved_interactive: int = 1,
+        min_budget: float = 5.0,
+        stale_ttl: float = 600.0,
+        max_cache_entries: int = 256
+    ):
+        if max_workers < 1:
+            raise ValueError("max_workers 必须大于 0")
+        if not 0 <= reserved_interactive < max_workers:
+            raise ValueError("reserved_interactive 必须在 [0, max_workers) 范围内")
+
+        self._search_fn = search_fn
+        self._background_slots = max_workers - reserved_interactive
+        self._min_budget = min_budget
+        self._stale_ttl = stale_ttl
+        self._max_cache_entries = max_cache_entries
+
+        self._queue = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._active_background = 0
+        self._closed = False
+        self._cache = {}
+
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"scheduler-{i}", daemon=True)
+            for i in range(max_workers)
+        ]
+        for w in self._workers:
+            w.start()
+
+    def submit(
+        self,
+        query: str,
+        priority: int = INTERACTIVE,
+        deadline: float = None,
+        **kwargs
+    ) -> Future:
+        """提交请求；deadline 为距现在的秒数，None 表示不限"""
+        expires = time.monotonic() + deadline if deadline is not None else math.inf
+        job = _Job(query, priority, expires, kwargs)
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("调度器已关闭")
+            # 同优先级内截止时间早的先执行
+            heapq.heappush(self._queue, (priority, expires, next(self._seq), job))
+            self._cond.notify_all()
+        return job.future
+
+    def shutdown(self, wait: bool = True):
+        """停止接收新请求，处理完队列后退出"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            for w in self._workers:
+                w.join()
+
+    def _next_job(self):
+        """
+        取出下一个请求，返回 (job, 是否占用后台槽位)
+        队首请求已来不及执行时直接取出放弃；后台槽位已满时，后台请求留在队列中等待
+        """
+        with self._cond:
+            while True:
+                wait = None
+                if self._queue:
+                    job = self._queue[0][3]
+                    remaining = job.deadline - time.monotonic()
+                    if remaining < self._min_budget:
+                        heapq.heappop(self._queue)
+                        return job, False
+                    if job.priority == INTERACTIVE or self._active_background < self._background_slots:
+                        heapq.heappop(self._queue)
+                        if job.priority != INTERACTIVE:
+                            self._active_background += 1
+                            return job, True
+                        return job, False
+                    # 等待期间队首可能变得来不及执行，届时醒来将其放弃
+                    if job.deadline != math.inf:
+                        wait = remaining - self._min_budget
+                elif self._closed:
+                    return None, False
+                self._cond.wait(wait)
+
+    def _release(self):
+        with self._cond:
+            self._active_background -= 1
+            self._cond.notify_all()
+
+    def _worker(self):
+        while True:
+            job, holds_slot = self._next_job()
+            if job is None:
+                return
+            try:
+                if job.future.set_running_or_notify_cancel():
+                    job.future.set_result(self._run(job))
+            except Exception as e:
+                job.future.set_exception(e)
+            finally:
+                if holds_slot:
+                    self._release()
+
+    def _run(self, job) -> dict:
+        key = (job.query, tuple(sorted(job.kwargs.items())))
+        remaining = job.deadline - time.monotonic()
+
+        if remaining < self._min_budget:
+            return self._shed(key, job.query)
+
+        # 无截止时间的请求沿用 search_fn 自身的默认超时
+        timeout = None if job.deadline == math.inf else remaining
+        result = self._search_fn(job.query, timeout=timeout, **job.kwargs)
+        if result.get("status") == "success":
+            self._store(key, result)
+        return result
+
+    def _store(self, key, result: dict):
+        """写入缓存，同时清理超过 stale_ttl 的条目并限制总数"""
+        now = time.monotonic()
+        with self._cond:
+            self._cache.pop(key, None)
+            self._cache[key] = (now, result)
+            # dict 保持插入顺序，最旧的条目在最前
+            for old_key, (stored, _) in list(self._cache.items()):
+                if now - stored <= self._stale_ttl and len(self._cache) <= self._max_cache_entries:
+                    break
+                del self._cache[old_key]
+
+    def _shed(self, key, query: str) -> dict:
+        """剩余时间不足：优先返回未过期的旧结果，否则放弃"""
+        with self._cond:
+            cached = self._cache.get(key)
+        if cached and time.monotonic() - cached[0] <= self._stale_ttl:
+            return {**cached[1], "stale": True}
+        return {"status": "error", "query": query, "message": "剩余时间不足，请求已放弃"}
@@ -10,24 +10,70 @@ import json
 import argparse
 import httpx
 import re
+import threading
+import time
+from functools import partial
+
+from scheduler import BACKGROUND, INTERACTIVE, RequestScheduler
+from tweet_records import SORT_KEYS, build_record, filter_records, top_k
 
 _http_client = None
+_client_lock = threading.Lock()
+
+CONNECT_TIMEOUT = 15.0
+READ_TIMEOUT = 60.0
+# 未指定 --min-budget 时，剩余时间低于该值（且不超过截止时间的一半）的请求直接放弃
+DEFAULT_MIN_BUDGET = 5.0
 
 def get_client(proxy: str = None) -> httpx.Client:
     global _http_client
-    if _http_client is None:
-        _http_client = httpx.Client(proxy=proxy, timeout=httpx.Timeout(15.0, read=60.0))
+    with _client_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(proxy=proxy or None, timeout=httpx.Timeout(CONNECT_TIMEOUT, read=READ_TIMEOUT))
     return _http_client
 
+def post_with_deadline(client: httpx.Client, url: str, timeout: float, **kwargs) -> httpx.Response:
+    """
+    在调用线程内以 timeout 秒为总预算完成 POST，超时抛出 httpx.TimeoutException
+
+    httpx 的超时按阶段、按单次读取计算，因此连接占用预算的一部分（不超过 CONNECT_TIMEOUT），
+    其余作为读超时，保证连接 + 等待响应头不超过预算；响应体逐块读取，
+    每块之后检查截止时间，超时即关闭响应、断开连接，不会把请求留在后台继续执行
+    """
+    deadline = time.monotonic() + timeout
+    connect = min(CONNECT_TIMEOUT, timeout / 2)
+    
+    with client.stream("POST", url, timeout=httpx.Timeout(timeout - connect, connect=connect), **kwargs) as response:
+        chunks = []
+        for chunk in response.iter_bytes():
+            if time.monotonic() > deadline:
+                raise httpx.TimeoutException(f"超过截止时间 ({timeout:.1f}s)", request=response.request)
+            chunks.append(chunk)
+    
+    # 响应体已解码，重建时去掉描述原始传输编码的头
+    headers = [
+        (k, v) for k, v in response.headers.items()
+        if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+    ]
+    return httpx.Response(
+        response.status_code, headers=headers,
+        content=b"".join(chunks), request=response.request
+    )
+
 def search_twitter(
     query: str, 
     api_key: str, 
     api_base: str = "https://api.x.ai/v1", 
     max_results: int = 10,
-    proxy: str = None
+    proxy: str = None,
+    sort_by: str = "relevance",
+    min_likes: int = 0,
+    timeout: float = None
 ) -> dict:
     """
     调用 Grok x_search，要求返回结构化 JSON
+    解析结果统一构建为 TweetRecord，再在本地完成过滤与排序
+    timeout 为本次请求的总时间预算（秒，含连接与读取），None 时使用客户端默认的分阶段超时
     """
     url = f"{api_base.rstrip('/')}/responses"
     headers = {
@@ -61,7 +107,10 @@ Return up to {max_results} tweets. Only return the JSON array, no other text."""
 
     try:
         client = get_client(proxy)
-        response = client.post(url, headers=headers, json=payload)
+        if timeout is None:
+            response = client.post(url, headers=headers, json=payload)
+        else:
+            response = post_with_deadline(client, url, timeout, headers=headers, json=payload)
         response.raise_for_status()
         
         data = response.json()
@@ -137,7 +186,9 @@ Return up to {max_results} tweets. Only return the JSON array, no other text."""
                     "url": f"https://x.com/i/status/{item.get('id')}"
                 })
         
-        result["tweets"] = tweets[:max_results]
+        # 本地后处理：一次性归一化，再过滤 / 排序 / 截断
+        records = filter_records([build_record(t) for t in tweets], min_likes=min_likes)
+        result["tweets"] = [r.to_dict() for r in top_k(records, max_results, sort_by)]
         
         # 打印成本报告
         input_tokens = result["usage"]["input_tokens"]
@@ -212,16 +263,50 @@ def parse_fallback(text: str, max_results: int) -> list:
     
     return tweets
 
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("必须为正整数")
+    return number
+
+def positive_float(value: str) -> float:
+    number = float(value)
+    if not 0 < number < float("inf"):
+        raise argparse.ArgumentTypeError("必须为正数")
+    return number
+
 def main():
     parser = argparse.ArgumentParser(description="Grok Twitter Search")
-    parser.add_argument("--query", required=True, help="搜索查询")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--query", help="搜索查询")
+    target.add_argument("--batch", help="批量查询文件（每行一个查询，按后台优先级执行）")
     parser.add_argument("--api-key", help="Grok API Key")
     parser.add_argument("--api-base", default="https://api.x.ai/v1")
     parser.add_argument("--max-results", type=int, default=10)
     parser.add_argument("--proxy", help="SOCKS5 代理")
+    parser.add_argument("--sort", default="relevance", choices=["relevance", *SORT_KEYS],
+                        help="本地排序方式")
+    parser.add_argument("--min-likes", type=int, default=0, help="最低点赞数")
+    parser.add_argument("--deadline", type=positive_float,
+                        help="截止时间（秒，从提交时起算）：单条查询即整次请求的总超时；"
+                             "批量模式下所有查询共享该截止时间，来不及执行的查询直接放弃")
+    parser.add_argument("--min-budget", type=positive_float,
+                        help=f"剩余时间低于该值（秒）的请求直接放弃，默认 min({DEFAULT_MIN_BUDGET:g}, deadline/2)")
+    parser.add_argument("--workers", type=positive_int, default=4, help="批量模式并发数")
     
     args = parser.parse_args()
     
+    if args.min_budget is not None:
+        if args.deadline is None:
+            parser.error("--min-budget 需要与 --deadline 一起使用")
+        if args.min_budget >= args.deadline:
+            parser.error("--min-budget 必须小于 --deadline")
+        min_budget = args.min_budget
+    elif args.deadline is not None:
+        min_budget = min(DEFAULT_MIN_BUDGET, args.deadline / 2)
+    else:
+        min_budget = 0.0
+    
     api_key = args.api_key or os.environ.get("GROK_API_KEY")
     if not api_key:
         print(json.dumps({"status": "error", "message": "缺少 GROK_API_KEY"}))
@@ -229,12 +314,29 @@ def main():
     
     proxy = args.proxy or os.environ.get("SOCKS5_PROXY")
     
-    result = search_twitter(
-        args.query, api_key, args.api_base, 
-        args.max_results, proxy
+    search = partial(
+        search_twitter,
+        api_key=api_key, api_base=args.api_base,
+        max_results=args.max_results, proxy=proxy,
+        sort_by=args.sort, min_likes=args.min_likes
     )
     
-    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.query:
+        queries, priority, workers = [args.query], INTERACTIVE, 1
+    else:
+        with open(args.batch, encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+        priority, workers = BACKGROUND, args.workers
+    
+    # 单条与批量查询都经由调度器，共享截止时间与放弃逻辑；
+    # CLI 进程内不会有其他交互请求，无需保留槽位
+    scheduler = RequestScheduler(search, max_workers=workers, reserved_interactive=0, min_budget=min_budget)
+    futures = [scheduler.submit(q, priority=priority, deadline=args.deadline) for q in queries]
+    results = [f.result() for f in futures]
+    scheduler.shutdown()
+    
+    output = results[0] if args.query else results
+    print(json.dumps(output, ensure_ascii=False, indent=2))
 
 if __name__ == "__main__":
     main()
@@ -9,8 +9,13 @@ import sys
 import json
 import subprocess
 import re
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import httpx
+
 def print_header():
     print("\n" + "="*50)
     print("  🍉 Grok Twitter Search - 交互式配置向导")
@@ -50,39 +55,153 @@ def check_curl():
     print("   请使用系统包管理器安装 curl")
     return False
 
-def check_warp():
-    """检查 WARP 状态"""
-    # 检查进程
-    try:
-        result = subprocess.run(["pgrep", "-x", "warp-svc"], capture_output=True)
-        warp_running = result.returncode == 0
-    except:
-        warp_running = False
+WARP_PROXY = "socks5://127.0.0.1:40000"
+API_BASE = "https://api.x.ai/v1"
+PROBE_SAMPLES = 3
+PROBE_TIMEOUT = 5.0
+# 单条线路全部探测的总时长上限，避免静默丢包的代理拖慢整个测速
+PROBE_ROUTE_BUDGET = 8.0
+# 失败样本占比超过该值的线路视为不可用（3 次中允许 1 次失败）
+PROBE_MAX_FAILURE_RATE = 0.34
+
+def candidate_routes():
+    """收集待测线路：直连、WARP、自定义 SOCKS5"""
+    routes = [("直连", ""), ("WARP", WARP_PROXY)]
     
-    # 检查端口
-    port_listening = False
-    try:
-        result = subprocess.run(["ss", "-tuln"], capture_output=True, text=True)
-        if ":40000" in result.stdout:
-            port_listening = True
-    except:
+    current_proxy = os.environ.get("SOCKS5_PROXY", "")
+    if current_proxy and current_proxy != WARP_PROXY:
+        routes.append(("当前配置", current_proxy))
+    
+    proxy = input("额外的 SOCKS5 代理 (如 socks5://host:port，留空跳过): ").strip()
+    if proxy and proxy not in (p for _, p in routes):
+        if not proxy.startswith("socks5://"):
+            print("⚠️  地址应以 'socks5://' 开头，仍将尝试测速")
+        routes.append(("自定义", proxy))
+    
+    return routes
+
+def probe_once(proxy, api_key, timeout=PROBE_TIMEOUT):
+    """
+    单次探测：新建连接请求 /models（免费接口），
+    通过 httpcore trace 事件拆分连接、TLS、首字节耗时（毫秒）
+    """
+    marks = {}
+    
+    def trace(event, info):
+        marks[event.split(".", 1)[-1]] = time.perf_counter()
+    
+    headers = {"Authorization": f"Bearer {api_key}"}
+    with httpx.Client(proxy=proxy or None, timeout=timeout) as client:
+        start = time.perf_counter()
+        with client.stream("GET", f"{API_BASE}/models", headers=headers,
+                           extensions={"trace": trace}) as response:
+            ttfb = time.perf_counter()
+    
+    # SOCKS 线路的连接阶段包含代理握手
+    connected = marks.get("setup_socks5_connection.complete") or marks.get("connect_tcp.complete", start)
+    tls_done = marks.get("start_tls.complete", connected)
+    return {
+        "connect": (connected - start) * 1000,
+        "tls": (tls_done - connected) * 1000,
+        "ttfb": (ttfb - start) * 1000,
+        "status": response.status_code,
+    }
+
+def probe_route(name, proxy, api_key):
+    """
+    对单条线路重复探测：只有 2xx 算成功，各阶段取成功样本的中位数
+    失败率不超过 PROBE_MAX_FAILURE_RATE 的线路才视为可用，偶发抖动不会直接淘汰线路；
+    尚无成功样本时遇到连接 / 代理错误即停止，全部探测不超过 PROBE_ROUTE_BUDGET 秒
+    """
+    samples = []
+    errors = []
+    statuses = []
+    deadline = time.monotonic() + PROBE_ROUTE_BUDGET
+    for _ in range(PROBE_SAMPLES):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
         try:
-            result = subprocess.run(["netstat", "-tuln"], capture_output=True, text=True)
-            if ":40000" in result.stdout:
-                port_listening = True
-        except:
-            pass
+            sample = probe_once(proxy, api_key, timeout=min(PROBE_TIMEOUT, remaining))
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.ProxyError, ImportError) as e:
+            errors.append(str(e) or type(e).__name__)
+            if not samples:
+                break
+            continue
+        except Exception as e:
+            errors.append(str(e) or type(e).__name__)
+            continue
+        statuses.append(sample["status"])
+        if 200 <= sample["status"] < 300:
+            samples.append(sample)
+        elif sample["status"] == 403:
+            errors.append("HTTP 403 (出口 IP 可能被封锁)")
+        else:
+            errors.append(f"HTTP {sample['status']}")
+    
+    route = {
+        "name": name,
+        "proxy": proxy,
+        "ok": bool(samples) and len(errors) / (len(samples) + len(errors)) <= PROBE_MAX_FAILURE_RATE,
+        "successes": len(samples),
+        "error": errors[-1] if errors else None,
+        "key_invalid": 401 in statuses,
+    }
+    if samples:
+        for field in ("connect", "tls", "ttfb"):
+            route[field] = statistics.median(s[field] for s in samples)
+    return route
+
+def rank_routes(results):
+    """可用线路按 TTFB 升序排在前面，不可用线路排最后"""
+    return sorted(results, key=lambda r: (not r["ok"], r.get("ttfb", 0) if r["ok"] else 0))
+
+def benchmark_routes(routes, api_key):
+    """并发测速所有线路，返回排序后的结果"""
+    print(f"\n⏱️  正在测速 {len(routes)} 条线路 (每条 {PROBE_SAMPLES} 次)...")
+    
+    with ThreadPoolExecutor(max_workers=len(routes)) as pool:
+        results = rank_routes(pool.map(lambda r: probe_route(r[0], r[1], api_key), routes))
+    
+    print(f"\n   {'线路':<8}{'代理':<28}{'连接':>9}{'TLS':>9}{'TTFB':>9}  状态")
+    for i, r in enumerate(results, 1):
+        proxy = r["proxy"] or "-"
+        passed = f"{r['successes']}/{PROBE_SAMPLES}"
+        if r["ok"]:
+            print(f"{i:>2}. {r['name']:<8}{proxy:<28}{r['connect']:>7.0f}ms{r['tls']:>7.0f}ms{r['ttfb']:>7.0f}ms  ✅ {passed}")
+        else:
+            print(f"{i:>2}. {r['name']:<8}{proxy:<28}{'-':>9}{'-':>9}{'-':>9}  ❌ {passed} {r['error'][:40]}")
     
-    if warp_running and port_listening:
-        print("✅ WARP 服务运行中，端口 40000 监听正常")
-        return True, True
-    elif warp_running:
-        print("⚠️  WARP 进程存在，但端口 40000 未监听")
-        print("   可能需要连接 WARP: warp-cli connect")
-        return True, False
-    else:
-        print("❌ WARP 未安装或未运行")
-        return False, False
+    return results
+
+def select_route(api_key):
+    """测速并选出最快的可用线路；没有可用线路时返回 None"""
+    results = benchmark_routes(candidate_routes(), api_key)
+    best = results[0]
+    
+    if not best["ok"]:
+        if any(r["key_invalid"] for r in results):
+            print("\n❌ API Key 无效 (HTTP 401)，所有线路均无法通过验证，请检查后重新运行向导")
+        else:
+            print("\n❌ 所有线路均无法访问 api.x.ai")
+            print_warp_guide()
+        return None
+    
+    label = f"{best['name']} ({best['proxy']})" if best["proxy"] else best["name"]
+    print(f"\n✅ 最快线路: {label}, TTFB {best['ttfb']:.0f}ms")
+    return best["proxy"]
+
+def print_warp_guide():
+    print("\n💡 WARP 安装指南:")
+    print("   Ubuntu/Debian:")
+    print("   curl -fsSL https://pkg.cloudflareclient.com/cloudflare-warp.asc | \\")
+    print("     sudo gpg --dearmor -o /usr/share/keyrings/cloudflare-warp-archive-keyring.gpg")
+    print("   echo 'deb [signed-by=/usr/share/keyrings/cloudflare-warp-archive-keyring.gpg] \\")
+    print("     https://pkg.cloudflareclient.com/ $(lsb_release -cs) main' | \\")
+    print("     sudo tee /etc/apt/sources.list.d/cloudflare-client.list")
+    print("   sudo apt update && sudo apt install cloudflare-warp")
+    print("   sudo systemctl start warp-svc")
+    print("   warp-cli registration new && warp-cli connect")
 
 def setup_grok_api_key():
     """配置 Grok API Key"""
@@ -122,128 +241,8 @@ def setup_grok_api_key():
         print("✅ API Key 已接收")
         return api_key
 
-def setup_proxy(warp_available):
-    """配置代理"""
-    current_proxy = os.environ.get("SOCKS5_PROXY", "")
-    
-    print("\n🌐 代理配置选项:")
-    print("   1. 自动检测 (推荐)")
-    print("   2. 使用 WARP 代理 (socks5://127.0.0.1:40000)")
-    print("   3. 自定义 SOCKS5 代理")
-    print("   4. 不使用代理 (直连)")
-    
-    if current_proxy:
-        print(f"\n   当前配置: {current_proxy}")
-    
-    choice = input("\n请选择 [1-4] (默认: 1): ").strip() or "1"
-    
-    if choice == "1":
-        print("✅ 将使用自动检测模式")
-        return "auto"
-    
-    elif choice == "2":
-        if not warp_available:
-            print("⚠️  WARP 似乎未运行，确定要使用此配置吗?")
-            confirm = input("   [y/N]: ").strip().lower()
-            if confirm != 'y':
-                return setup_proxy(warp_available)
-        print("✅ 将使用 WARP 代理: socks5://127.0.0.1:40000")
-        return "socks5://127.0.0.1:40000"
-    
-    elif choice == "3":
-        proxy = input("请输入 SOCKS5 代理地址 (如 socks5://host:port): ").strip()
-        if not proxy.startswith("socks5://"):
-            print("⚠️  地址应以 'socks5://' 开头")
-            confirm = input("是否继续? [y/N]: ").strip().lower()
-            if confirm != 'y':
-                return setup_proxy(warp_available)
-        print(f"✅ 将使用自定义代理: {proxy}")
-        return proxy
-    
-    elif choice == "4":
-        print("✅ 将使用直连模式")
-        return ""
-    
-    else:
-        print("❌ 无效选择，使用自动检测")
-        return "auto"
-
-def test_connection(api_key, proxy):
-    """测试连接"""
-    print("\n🧪 测试连接到 Grok API...")
-    
-    # 检查 uv 是否可用
-    if not check_uv():
-        print("\n❌ uv 未安装，无法运行测试")
-        print("   请先安装 uv: curl -LsSf https://astral.sh/uv/install.sh | sh")
-        return False
-    
-    script_dir = Path(__file__).parent
-    search_script = script_dir / "search_twitter.py"
-    
-    # 检查 pyproject.toml 是否存在
-    pyproject = script_dir.parent / "pyproject.toml"
-    if not pyproject.exists():
-        print(f"\n⚠️  缺少 {pyproject}，尝试安装依赖...")
-        try:
-            subprocess.run(["uv", "sync"], cwd=str(script_dir.parent), check=True)
-        except Exception as e:
-            print(f"❌ 依赖安装失败: {e}")
-            return False
-    
-    cmd = [
-        "uv", "run", str(search_script),
-        "--query", "test",
-        "--max-results", "1",
-        "--api-key", api_key
-    ]
-    
-    if proxy and proxy != "auto":
-        env = os.environ.copy()
-        env["SOCKS5_PROXY"] = proxy
-    else:
-        env = os.environ.copy()
-        # 如果 proxy 是 auto，让脚本自己检测
-        if "SOCKS5_PROXY" in env:
-            del env["SOCKS5_PROXY"]
-    
-    try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=30,
-            env=env
-        )
-        
-        if result.returncode == 0:
-            try:
-                data = json.loads(result.stdout)
-                if data.get("status") == "success":
-                    print("✅ 连接测试成功!")
-                    print(f"   获取到 {len(data.get('tweets', []))} 条推文")
-                    return True
-                else:
-                    print(f"❌ API 返回错误: {data.get('message', '未知错误')}")
-                    return False
-            except json.JSONDecodeError:
-                print("❌ 无法解析响应")
-                print(f"   输出: {result.stdout[:200]}")
-                return False
-        else:
-            print(f"❌ 测试失败")
-            print(f"   错误: {result.stderr[:200]}")
-            return False
-            
-    except subprocess.TimeoutExpired:
-        print("❌ 连接超时")
-        return False
-    except Exception as e:
-        print(f"❌ 测试出错: {e}")
-        return False
-
 def save_config(api_key, proxy_choice):
-    """保存配置建议"""
+    """保存配置：proxy_choice 为 None 时不写入 SOCKS5_PROXY，空字符串表示直连"""
     print("\n💾 配置保存建议")
     print("=" * 50)
     
@@ -255,7 +254,7 @@ def save_config(api_key, proxy_choice):
     print(f"\n方法 1: 添加到 {shell_rc}")
     print("-" * 40)
     print(f'export GROK_API_KEY="{api_key}"')
-    if proxy_choice and proxy_choice != "auto":
+    if proxy_choice is not None:
         print(f'export SOCKS5_PROXY="{proxy_choice}"')
     
     # 方法2: OpenClaw 配置
@@ -273,61 +272,57 @@ def save_config(api_key, proxy_choice):
             }
         }
     }
-    if proxy_choice and proxy_choice != "auto":
+    if proxy_choice is not None:
         config["skills"]["entries"]["grok-twitter-search"]["env"]["SOCKS5_PROXY"] = proxy_choice
     
     print(json.dumps(config, indent=2))
     
-    # 询问是否写入 openclaw.json
-    print("\n是否自动写入 ~/.openclaw/openclaw.json?")
-    choice = input("[y/N]: ").strip().lower()
-    
-    if choice == 'y':
-        try:
-            config_path = Path.home() / ".openclaw" / "openclaw.json"
-            config_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # 读取现有配置
-            existing = {}
-            if config_path.exists():
-                with open(config_path, 'r') as f:
-                    content = f.read()
-                    # 处理 JSON5 注释: // 和 /* */
-                    content = re.sub(r'//.*$', '', content, flags=re.MULTILINE)
-                    content = re.sub(r'/\*.*?\*/', '', content, flags=re.DOTALL)
-                    try:
-                        existing = json.loads(content)
-                    except:
-                        existing = {}
-            
-            # 合并配置 (深度合并而非覆盖)
-            if "skills" not in existing:
-                existing["skills"] = {}
-            if "entries" not in existing["skills"]:
-                existing["skills"]["entries"] = {}
-            
-            # 保留现有配置，只更新 grok-twitter-search
-            existing_skill = existing["skills"]["entries"].get("grok-twitter-search", {})
-            new_skill = config["skills"]["entries"]["grok-twitter-search"]
-            
-            # 合并 env
-            if "env" in existing_skill and "env" in new_skill:
-                existing_skill["env"].update(new_skill["env"])
-            
-            # 更新其他字段
-            existing_skill.update(new_skill)
-            existing["skills"]["entries"]["grok-twitter-search"] = existing_skill
-            
-            # 写回 (使用 JSON5 格式保留注释友好性)
-            with open(config_path, 'w') as f:
-                json.dump(existing, f, indent=2)
-            
-            print(f"✅ 配置已写入: {config_path}")
-            print("   重启 OpenClaw Gateway 后生效")
-            
-        except Exception as e:
-            print(f"❌ 写入失败: {e}")
-            print("   请手动复制上面的配置")
+    # 写入 openclaw.json
+    try:
+        config_path = Path.home() / ".openclaw" / "openclaw.json"
+        config_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # 读取现有配置
+        existing = {}
+        if config_path.exists():
+            with open(config_path, 'r') as f:
+                content = f.read()
+                # 处理 JSON5 注释: // 和 /* */
+                content = re.sub(r'//.*$', '', content, flags=re.MULTILINE)
+                content = re.sub(r'/\*.*?\*/', '', content, flags=re.DOTALL)
+                try:
+                    existing = json.loads(content)
+                except:
+                    existing = {}
+        
+        # 合并配置 (深度合并而非覆盖)
+        if "skills" not in existing:
+            existing["skills"] = {}
+        if "entries" not in existing["skills"]:
+            existing["skills"]["entries"] = {}
+        
+        # 保留现有配置，只更新 grok-twitter-search
+        existing_skill = existing["skills"]["entries"].get("grok-twitter-search", {})
+        new_skill = config["skills"]["entries"]["grok-twitter-search"]
+        
+        # 合并 env
+        if "env" in existing_skill and "env" in new_skill:
+            existing_skill["env"].update(new_skill["env"])
+        
+        # 更新其他字段
+        existing_skill.update(new_skill)
+        existing["skills"]["entries"]["grok-twitter-search"] = existing_skill
+        
+        # 写回 (使用 JSON5 格式保留注释友好性)
+        with open(config_path, 'w') as f:
+            json.dump(existing, f, indent=2)
+        
+        print(f"✅ 配置已写入: {config_path}")
+        print("   重启 OpenClaw Gateway 后生效")
+        
+    except Exception as e:
+        print(f"❌ 写入失败: {e}")
+        print("   请手动复制上面的配置")
 
 def main():
     print_header()
@@ -341,39 +336,23 @@ def main():
         print("\n⚠️  缺少 uv，部分功能可能受限")
         print("   但 skill 仍可通过其他方式运行")
     
-    # 步骤 2: 检查 WARP
-    print_step(2, 4, "检查 WARP 代理")
-    warp_installed, warp_ready = check_warp()
-    
-    if not warp_installed:
-        print("\n💡 WARP 安装指南:")
-        print("   Ubuntu/Debian:")
-        print("   curl -fsSL https://pkg.cloudflareclient.com/cloudflare-warp.asc | \\")
-        print("     sudo gpg --dearmor -o /usr/share/keyrings/cloudflare-warp-archive-keyring.gpg")
-        print("   echo 'deb [signed-by=/usr/share/keyrings/cloudflare-warp-archive-keyring.gpg] \\")
-        print("     https://pkg.cloudflareclient.com/ $(lsb_release -cs) main' | \\")
-        print("     sudo tee /etc/apt/sources.list.d/cloudflare-client.list")
-        print("   sudo apt update && sudo apt install cloudflare-warp")
-        print("   sudo systemctl start warp-svc")
-        print("   warp-cli registration new && warp-cli connect")
-    
-    # 步骤 3: 配置 API Key 和代理
-    print_step(3, 4, "配置 API Key 和代理")
+    # 步骤 2: 配置 API Key
+    print_step(2, 4, "配置 API Key")
     api_key = setup_grok_api_key()
-    proxy_choice = setup_proxy(warp_ready)
     
-    # 步骤 4: 测试连接
-    print_step(4, 4, "测试连接")
-    success = test_connection(api_key, proxy_choice)
+    # 步骤 3: 线路测速 (直连 / WARP / 自定义 SOCKS5)
+    print_step(3, 4, "线路测速")
+    proxy_choice = select_route(api_key)
     
-    if success:
-        print("\n🎉 配置成功!")
+    # 步骤 4: 保存配置
+    print_step(4, 4, "保存配置")
+    if proxy_choice is not None:
         save_config(api_key, proxy_choice)
     else:
-        print("\n⚠️  连接测试失败，但仍保存配置?")
+        print("\n⚠️  没有可用线路，但仍保存 API Key?")
         choice = input("是否继续保存? [y/N]: ").strip().lower()
         if choice == 'y':
-            save_config(api_key, proxy_choice)
+            save_config(api_key, None)
     
     print("\n" + "="*50)
     print("  配置完成! 使用方法:")
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+紧凑推文记录 + 本地后处理
+解析阶段一次性归一化（时间戳 → epoch，互动数 → int，状态 ID → int），
+之后的排序 / 过滤 / top-k 全部在内存中完成，不再逐次解析字符串
+"""
+
+import heapq
+import math
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+# 互动评分权重：转推的传播价值高于点赞
+RETWEET_WEIGHT = 2.0
+
+_SUFFIX_MULTIPLIERS = {"K": 1_000, "M": 1_000_000, "B": 1_000_000_000}
+_STATUS_ID_PATTERN = re.compile(r"/status/(\d+)")
+_TIMESTAMP_FORMATS = (
+    "%b %d, %Y",
+    "%B %d, %Y",
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+)
+
+
+@dataclass(slots=True)
+class TweetRecord:
+    """单条推文的紧凑表示，字段在构建时已归一化"""
+    author: str
+    content: str
+    timestamp: str
+    epoch: int
+    likes: int
+    retweets: int
+    status_id: int
+    url: str
+    score: float
+
+    def to_dict(self) -> dict:
+        """转换为 CLI 输出使用的 dict（保留原始 timestamp 文本）"""
+        return {
+            "author": self.author,
+            "content": self.content,
+            "timestamp": self.timestamp,
+            "epoch": self.epoch,
+            "likes": self.likes,
+            "retweets": self.retweets,
+            "url": self.url,
+        }
+
+
+def parse_count(value) -> int:
+    """解析互动数：支持 int / float / "3.8K" / "1,234" 等格式，失败返回 0"""
+    if isinstance(value, bool):
+        return 0
+    if isinstance(value, int):
+        return max(value, 0)
+    if isinstance(value, float):
+        return max(round(value), 0) if math.isfinite(value) else 0
+    if not isinstance(value, str):
+        return 0
+
+    text = value.strip().replace(",", "").upper()
+    if not text:
+        return 0
+
+    multiplier = _SUFFIX_MULTIPLIERS.get(text[-1], 1)
+    if multiplier > 1:
+        text = text[:-1]
+    try:
+        number = float(text) * multiplier
+    except ValueError:
+        return 0
+    # NaN / Infinity 可能经 json.loads 或字符串传入，round 避免 4.1M → 4099999
+    return max(round(number), 0) if math.isfinite(number) else 0
+
+
+def parse_timestamp(value) -> int:
+    """解析时间戳为 UTC epoch 秒：支持 "Nov 12, 2025"、ISO 8601 及数值，失败返回 0"""
+    if isinstance(value, bool):
+        return 0
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value) if math.isfinite(value) else 0
+    if not isinstance(value, str):
+        return 0
+
+    text = value.strip()
+    if not text:
+        return 0
+
+    try:
+        dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        dt = None
+        for fmt in _TIMESTAMP_FORMATS:
+            try:
+                dt = datetime.strptime(text, fmt)
+                break
+            except ValueError:
+                continue
+        if dt is None:
+            return 0
+
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def parse_status_id(url: str) -> int:
+    """从推文 URL 中提取状态 ID，失败返回 0"""
+    match = _STATUS_ID_PATTERN.search(url or "")
+    return int(match.group(1)) if match else 0
+
+
+def engagement_score(likes: int, retweets: int) -> float:
+    """互动评分：点赞 + 加权转推"""
+    return likes + RETWEET_WEIGHT * retweets
+
+
+def build_record(tweet: dict) -> TweetRecord:
+    """由解析得到的原始 dict 构建 TweetRecord"""
+    timestamp = tweet.get("timestamp", "")
+    likes = parse_count(tweet.get("likes", 0))
+    retweets = parse_count(tweet.get("retweets", 0))
+    url = tweet.get("url", "") or ""
+
+    return TweetRecord(
+        author=tweet.get("author", "") or "",
+        content=tweet.get("content", "") or "",
+        timestamp=str(timestamp or ""),
+        epoch=parse_timestamp(timestamp),
+        likes=likes,
+        retweets=retweets,
+        status_id=parse_status_id(url),
+        url=url,
+        score=engagement_score(likes, retweets),
+    )
+
+
+# 排序键：relevance 保持 Grok 返回顺序
+SORT_KEYS = {
+    "latest": lambda r: (r.epoch, r.status_id),
+    "likes": lambda r: r.likes,
+    "retweets": lambda r: r.retweets,
+    "engagement": lambda r: r.score,
+}
+
+
+def sort_records(records: list, by: str = "relevance") -> list:
+    """按指定键降序排序，relevance 不改变顺序"""
+    if by == "relevance":
+        return list(records)
+    return sorted(records, key=SORT_KEYS[by], reverse=True)
+
+
+def filter_records(
+    records: list,
+    min_likes: int = 0,
+    min_retweets: int = 0,
+    since: int = None,
+    until: int = None,
+    author: str = None
+) -> list:
+    """按互动数、时间范围（epoch）与作者过滤"""
+    if author:
+        author = "@" + author.lstrip("@").lower()
+
+    result = []
+    for r in records:
+        if r.likes < min_likes or r.retweets < min_retweets:
+            continue
+        if since is not None and r.epoch < since:
+            continue
+        if until is not None and r.epoch > until:
+            continue
+        if author and r.author.lower() != author:
+            continue
+        result.append(r)
+    return result
+
+
+def top_k(records: list, k: int, by: str = "engagement") -> list:
+    """取前 k 条，k 远小于总量时避免全量排序"""
+    if by == "relevance":
+        return list(records[:k])
+    return heapq.nlargest(k, records, key=SORT_KEYS[by])
@@ -0,0 +1,162 @@
+import threading
+import time
+
+import pytest
+
+from scheduler import BACKGROUND, INTERACTIVE, RequestScheduler
+
+
+class FakeSearch:
+    """记录调用顺序；gate 未放行前阻塞，便于构造竞争"""
+
+    def __init__(self, delay=0.0, status="success"):
+        self.calls = []
+        self.delay = delay
+        self.status = status
+        self.gate = threading.Event()
+        self.gate.set()
+        self.lock = threading.Lock()
+
+    def __call__(self, query, timeout=None):
+        with self.lock:
+            self.calls.append((query, timeout))
+        self.gate.wait()
+        time.sleep(self.delay)
+        return {"status": self.status, "query": query}
+
+
+@pytest.fixture
+def make_scheduler():
+    created = []
+
+    def factory(search, **kwargs):
+        scheduler = RequestScheduler(search, **kwargs)
+        created.append((scheduler, search))
+        return scheduler
+
+    yield factory
+    for scheduler, search in created:
+        search.gate.set()
+        scheduler.shutdown()
+
+
+def test_interactive_jumps_queue(make_scheduler):
+    search = FakeSearch()
+    search.gate.clear()
+    scheduler = make_scheduler(search, max_workers=1, reserved_interactive=0, min_budget=0)
+
+    first = scheduler.submit("bg0", priority=BACKGROUND)
+    while not search.calls:
+        time.sleep(0.01)
+    rest = [scheduler.submit(f"bg{i}", priority=BACKGROUND) for i in (1, 2)]
+    interactive = scheduler.submit("ia", priority=INTERACTIVE)
+    search.gate.set()
+
+    for f in [first, interactive, *rest]:
+        f.result(timeout=5)
+    assert [q for q, _ in search.calls] == ["bg0", "ia", "bg1", "bg2"]
+
+
+def test_reserved_slot_stays_free_for_interactive(make_scheduler):
+    search = FakeSearch()
+    search.gate.clear()
+    scheduler = make_scheduler(search, max_workers=2, reserved_interactive=1, min_budget=0)
+
+    background = [scheduler.submit(f"bg{i}", priority=BACKGROUND) for i in range(2)]
+    time.sleep(0.1)
+    assert [q for q, _ in search.calls] == ["bg0"]
+
+    interactive = scheduler.submit("ia", priority=INTERACTIVE)
+    time.sleep(0.1)
+    assert [q for q, _ in search.calls] == ["bg0", "ia"]
+
+    search.gate.set()
+    for f in [interactive, *background]:
+        assert f.result(timeout=5)["status"] == "success"
+
+
+def test_timeout_derived_from_deadline(make_scheduler):
+    search = FakeSearch()
+    scheduler = make_scheduler(search, max_workers=1, reserved_interactive=0, min_budget=0.5)
+
+    scheduler.submit("q", deadline=3).result(timeout=5)
+    timeout = search.calls[0][1]
+    assert 2.5 < timeout <= 3
+
+
+def test_no_deadline_uses_default_timeout(make_scheduler):
+    search = FakeSearch()
+    scheduler = make_scheduler(search, max_workers=1, reserved_interactive=0)
+
+    scheduler.submit("q").result(timeout=5)
+    assert search.calls == [("q", None)]
+
+
+def test_sheds_without_calling_upstream(make_scheduler):
+    search = FakeSearch()
+    scheduler = make_scheduler(search, max_workers=1, reserved_interactive=0, min_budget=5)
+
+    result = scheduler.submit("q", deadline=1).result(timeout=5)
+    assert result["status"] == "error"
+    assert search.calls == []
+
+
+def test_idle_worker_sheds_expired_background(make_scheduler):
+    search = FakeSearch()
+    search.gate.clear()
+    # 唯一的后台槽位被占用，另一工作线程空闲
+    scheduler = make_scheduler(search, max_workers=2, reserved_interactive=1, min_budget=0.2)
+
+    blocker = scheduler.submit("blocker", priority=BACKGROUND)
+    while not search.calls:
+        time.sleep(0.01)
+    doomed = scheduler.submit("doomed", priority=BACKGROUND, deadline=0.4)
+
+    result = doomed.result(timeout=2)
+    assert result["status"] == "error"
+    assert not blocker.done()
+    assert [q for q, _ in search.calls] == ["blocker"]
+
+
+def test_shed_serves_stale_result(make_scheduler):
+    search = FakeSearch()
+    scheduler = make_scheduler(search, max_workers=1, reserved_interactive=0, min_budget=2)
+
+    fresh = scheduler.submit("q").result(timeout=5)
+    stale = scheduler.submit("q", deadline=1).result(timeout=5)
+    assert "stale" not in fresh
+    assert stale == {**fresh, "stale": True}
+    assert len(search.calls) == 1
+
+
+def test_failed_results_are_not_cached(make_scheduler):
+    search = FakeSearch(status="error")
+    scheduler = make_scheduler(search, max_workers=1, reserved_interactive=0, min_budget=2)
+
+    scheduler.submit("q").result(timeout=5)
+    assert scheduler.submit("q", deadline=1).result(timeout=5).get("stale") is None
+
+
+def test_cache_is_bounded(make_scheduler):
+    search = FakeSearch()
+    scheduler = make_scheduler(search, max_workers=1, reserved_interactive=0, max_cache_entries=3)
+
+    for i in range(5):
+        scheduler.submit(f"q{i}").result(timeout=5)
+    assert [key[0] for key in scheduler._cache] == ["q2", "q3", "q4"]
+
+
+def test_cache_drops_entries_past_ttl(make_scheduler):
+    search = FakeSearch()
+    scheduler = make_scheduler(search, max_workers=1, reserved_interactive=0, stale_ttl=0.1)
+
+    scheduler.submit("old").result(timeout=5)
+    time.sleep(0.2)
+    scheduler.submit("new").result(timeout=5)
+    assert [key[0] for key in scheduler._cache] == ["new"]
+
+
+@pytest.mark.parametrize("workers, reserved", [(0, 0), (1, 1), (2, -1)])
+def test_rejects_invalid_capacity(workers, reserved):
+    with pytest.raises(ValueError):
+        RequestScheduler(FakeSearch(), max_workers=workers, reserved_interactive=reserved)
@@ -0,0 +1,70 @@
+import threading
+import time
+
+import httpx
+import pytest
+
+import search_twitter
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def install(handler):
+        client = httpx.Client(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(search_twitter, "_http_client", client)
+        return client
+    return install
+
+
+class TrickleStream(httpx.SyncByteStream):
+    """每块间隔 delay 秒的响应体，记录是否被关闭"""
+
+    def __init__(self, chunks=20, delay=0.05):
+        self.chunks = chunks
+        self.delay = delay
+        self.closed = False
+
+    def __iter__(self):
+        for _ in range(self.chunks):
+            time.sleep(self.delay)
+            yield b" "
+
+    def close(self):
+        self.closed = True
+
+
+def test_deadline_bounds_trickling_body(client):
+    stream = TrickleStream()
+    client(lambda request: httpx.Response(200, stream=stream))
+    threads = threading.active_count()
+
+    start = time.monotonic()
+    result = search_twitter.search_twitter("q", "key", timeout=0.2)
+    elapsed = time.monotonic() - start
+
+    assert result["status"] == "error"
+    assert elapsed < 0.5
+    # 响应在调用线程内关闭，不会留下后台线程继续读取
+    assert stream.closed
+    assert threading.active_count() == threads
+
+
+def test_post_with_deadline_returns_readable_response(client):
+    client(lambda request: httpx.Response(200, json={"ok": True}))
+    response = search_twitter.post_with_deadline(search_twitter._http_client, "https://api.x.ai/v1/responses", 5)
+    assert response.json() == {"ok": True}
+
+
+def test_parses_and_ranks_json_output(client):
+    text = (
+        '[{"author": "@a", "content": "x", "timestamp": "Nov 12, 2025", "likes": "3.8K", '
+        '"retweets": 1, "url": "https://x.com/i/status/1"},'
+        ' {"author": "@b", "content": "y", "timestamp": "Nov 13, 2025", "likes": NaN, '
+        '"retweets": 0, "url": "https://x.com/i/status/2"}]'
+    )
+    body = {"output": [{"type": "message", "content": [{"type": "output_text", "text": text}]}]}
+    client(lambda request: httpx.Response(200, json=body))
+
+    result = search_twitter.search_twitter("q", "key", sort_by="likes", timeout=5)
+    assert result["status"] == "success"
+    assert [(t["author"], t["likes"]) for t in result["tweets"]] == [("@a", 3800), ("@b", 0)]
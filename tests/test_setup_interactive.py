@@ -0,0 +1,109 @@
+import time
+
+import httpx
+import pytest
+
+import setup_interactive
+from setup_interactive import WARP_PROXY, probe_route, rank_routes, select_route
+
+
+def sample(status=200, ttfb=100.0):
+    return {"connect": ttfb / 4, "tls": ttfb / 4, "ttfb": ttfb, "status": status}
+
+
+@pytest.fixture
+def fake_probe(monkeypatch):
+    """按代理地址返回预设的探测结果序列；异常实例会被抛出"""
+    calls = []
+
+    def install(plan):
+        queues = {proxy: list(outcomes) for proxy, outcomes in plan.items()}
+
+        def probe_once(proxy, api_key, timeout=None):
+            calls.append((proxy, timeout))
+            outcome = queues[proxy].pop(0)
+            if callable(outcome):
+                outcome = outcome()
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        monkeypatch.setattr(setup_interactive, "probe_once", probe_once)
+        monkeypatch.setattr(setup_interactive, "candidate_routes",
+                            lambda: [("直连", ""), ("WARP", WARP_PROXY)])
+        return calls
+    return install
+
+
+def test_only_2xx_counts_as_working(fake_probe):
+    fake_probe({"": [sample(403, 10)] * 3})
+    route = probe_route("直连", "", "key")
+    assert not route["ok"]
+    assert "403" in route["error"]
+
+
+def test_transient_failure_does_not_disqualify(fake_probe):
+    fake_probe({"": [sample(ttfb=100), httpx.ConnectError("blip"), sample(ttfb=300)]})
+    route = probe_route("直连", "", "key")
+    assert route["ok"]
+    assert route["successes"] == 2
+    assert route["ttfb"] == 200
+
+
+def test_failure_rate_cutoff(fake_probe):
+    fake_probe({"": [sample(), httpx.ConnectError("down"), httpx.ConnectError("down")]})
+    assert not probe_route("直连", "", "key")["ok"]
+
+
+@pytest.mark.parametrize("error", [
+    httpx.ConnectError("refused"),
+    httpx.ConnectTimeout("dropped"),
+    httpx.ProxyError("socks failure"),
+])
+def test_dead_route_stops_after_first_connect_error(fake_probe, error):
+    calls = fake_probe({WARP_PROXY: [error] * 3})
+    route = probe_route("WARP", WARP_PROXY, "key")
+    assert not route["ok"]
+    assert len(calls) == 1
+
+
+def test_route_budget_caps_total_probe_time(fake_probe, monkeypatch):
+    monkeypatch.setattr(setup_interactive, "PROBE_ROUTE_BUDGET", 0.3)
+
+    def slow_timeout():
+        time.sleep(0.2)
+        raise httpx.ReadTimeout("silent")
+
+    calls = fake_probe({"": [slow_timeout] * 3})
+    start = time.monotonic()
+    route = probe_route("直连", "", "key")
+    assert time.monotonic() - start < 0.5
+    assert not route["ok"]
+    assert len(calls) == 2
+    # 后续探测的超时不超过剩余预算
+    assert calls[1][1] < 0.3
+
+
+def test_blocked_direct_route_never_wins(fake_probe):
+    fake_probe({"": [sample(403, 10)] * 3, WARP_PROXY: [sample(200, 500)] * 3})
+    assert select_route("key") == WARP_PROXY
+
+
+def test_fastest_working_route_wins(fake_probe):
+    fake_probe({"": [sample(200, 80)] * 3, WARP_PROXY: [sample(200, 500)] * 3})
+    assert select_route("key") == ""
+
+
+def test_invalid_key_is_not_a_working_route(fake_probe, capsys):
+    fake_probe({"": [sample(401, 10)] * 3, WARP_PROXY: [httpx.ConnectError("refused")] * 3})
+    assert select_route("key") is None
+    assert "API Key 无效" in capsys.readouterr().out
+
+
+def test_rank_routes_puts_failures_last():
+    routes = [
+        {"name": "a", "ok": False},
+        {"name": "b", "ok": True, "ttfb": 300},
+        {"name": "c", "ok": True, "ttfb": 100},
+    ]
+    assert [r["name"] for r in rank_routes(routes)] == ["c", "b", "a"]
@@ -0,0 +1,100 @@
+import json
+import math
+
+import pytest
+
+from tweet_records import (
+    build_record,
+    filter_records,
+    parse_count,
+    parse_status_id,
+    parse_timestamp,
+    sort_records,
+    top_k,
+)
+
+
+@pytest.mark.parametrize("value, expected", [
+    (1234, 1234),
+    (12.6, 13),
+    ("96", 96),
+    ("1,234", 1234),
+    ("3.8K", 3800),
+    ("4.1M", 4_100_000),
+    ("2.3b", 2_300_000_000),
+    ("", 0),
+    ("abc", 0),
+    (None, 0),
+    (True, 0),
+    (-5, 0),
+])
+def test_parse_count(value, expected):
+    assert parse_count(value) == expected
+
+
+@pytest.mark.parametrize("value", [
+    "inf", "-inf", "nan", "infK",
+    math.inf, math.nan,
+    json.loads("NaN"), json.loads("Infinity"),
+])
+def test_parse_count_non_finite(value):
+    assert parse_count(value) == 0
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("Nov 12, 2025", 1762905600),
+    ("November 12, 2025", 1762905600),
+    ("2025-11-12", 1762905600),
+    ("2026-02-26T10:00:00Z", 1772100000),
+    ("2026-02-26T18:00:00+08:00", 1772100000),
+    (1772100000, 1772100000),
+    ("yesterday", 0),
+    ("", 0),
+    (None, 0),
+    (math.inf, 0),
+    (math.nan, 0),
+])
+def test_parse_timestamp(value, expected):
+    assert parse_timestamp(value) == expected
+
+
+def test_parse_status_id():
+    assert parse_status_id("https://x.com/i/status/1988689709045047579") == 1988689709045047579
+    assert parse_status_id("https://x.com/elonmusk") == 0
+    assert parse_status_id(None) == 0
+
+
+def _records():
+    return [
+        build_record({"author": "@a", "timestamp": "Nov 12, 2025", "likes": "3.8K", "retweets": 10,
+                      "url": "https://x.com/i/status/3"}),
+        build_record({"author": "@B", "timestamp": "2026-02-26T10:00:00Z", "likes": 96, "retweets": "2K",
+                      "url": "https://x.com/i/status/2"}),
+        build_record({"author": "@c", "timestamp": "Sep 22, 2023", "likes": "NaN", "retweets": None,
+                      "url": ""}),
+    ]
+
+
+def test_build_record_normalizes_fields():
+    record = _records()[0]
+    assert record.epoch == 1762905600
+    assert record.likes == 3800
+    assert record.status_id == 3
+    assert record.score == 3820
+    assert record.to_dict()["timestamp"] == "Nov 12, 2025"
+
+
+def test_sort_and_top_k():
+    records = _records()
+    assert [r.author for r in sort_records(records, "relevance")] == ["@a", "@B", "@c"]
+    assert [r.author for r in sort_records(records, "latest")] == ["@B", "@a", "@c"]
+    assert [r.author for r in top_k(records, 1, "likes")] == ["@a"]
+    assert [r.author for r in top_k(records, 2, "engagement")] == ["@B", "@a"]
+    assert [r.author for r in top_k(records, 2, "relevance")] == ["@a", "@B"]
+
+
+def test_filter_records():
+    records = _records()
+    assert [r.author for r in filter_records(records, min_likes=100)] == ["@a"]
+    assert [r.author for r in filter_records(records, since=1762905600)] == ["@a", "@B"]
+    assert [r.author for r in filter_records(records, author="b")] == ["@B"]